@@ -1,7 +1,9 @@
 import os
-import urllib.request
 import zipfile
 import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import urllib3
 
 # Folder to store downloaded models
 output_folder = "data/vosk_models"
@@ -16,30 +18,50 @@ models = {
     "es": f"https://alphacephei.com/vosk/models/vosk-model-es-{VERSION}.zip",
 }
 
-for lang, url in models.items():
-    zip_path = os.path.join(output_folder, f"{lang}.zip")
-    
-    # Download the model
+# Shared connection pool so both downloads reuse the same TLS connections
+http = urllib3.PoolManager(maxsize=4)
+
+# Downloads larger than this spill from memory to an anonymous temp file
+SPOOL_MAX_SIZE = 64 * 1024 * 1024
+
+def download_and_extract(lang: str, url: str) -> str:
+    """
+    Download a model zip into a spooled buffer and extract it straight away.
+    No .zip file is written to the output folder, and each model is extracted
+    as soon as its own download finishes, overlapping with the other downloads.
+    """
     print(f"Downloading {lang} model version {VERSION}...")
-    urllib.request.urlretrieve(url, zip_path)
-    
-    # Extract the model
-    print(f"Extracting {lang} model...")
-    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+    response = http.request("GET", url, preload_content=False)
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as buffer:
+        try:
+            if response.status != 200:
+                raise RuntimeError(f"Failed to download {url}: HTTP {response.status}")
+            shutil.copyfileobj(response, buffer)
+        finally:
+            response.release_conn()
+
+        # Extract the model
+        print(f"Extracting {lang} model...")
+        buffer.seek(0)
         temp_extract_path = os.path.join(output_folder, f"{lang}_temp")
-        zip_ref.extractall(temp_extract_path)
-    
+        with zipfile.ZipFile(buffer, 'r') as zip_ref:
+            zip_ref.extractall(temp_extract_path)
+
     # Move contents to final folder without version number
     extracted_folder = next(os.scandir(temp_extract_path)).path
     final_folder = os.path.join(output_folder, lang)
     if os.path.exists(final_folder):
         shutil.rmtree(final_folder)
     shutil.move(extracted_folder, final_folder)
-    
+
     # Clean up
     shutil.rmtree(temp_extract_path)
-    os.remove(zip_path)
-    
+
     print(f"{lang} model is ready in folder: {final_folder}\n")
+    return final_folder
+
+# Download and extract all models concurrently
+with ThreadPoolExecutor(max_workers=len(models)) as executor:
+    list(executor.map(download_and_extract, models.keys(), models.values()))
 
 print("All models have been downloaded and prepared in:", output_folder)
@@ -5,68 +5,110 @@ Simple main script to process HTML files into audio, subtitles, and videos.
 
 import os
 import sys
+from functools import partial
 from pathlib import Path
+from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
 from src.preprocess import DocumentProcessor
-from src.tts import TTSEngine
-from src.videocreator import VideoCreator
+from src.tts import TTSEngine, MAX_CONCURRENT_REQUESTS
+from src.videocreator import VideoCreator, detect_hw_encoder
 from src.logger import Logger
 from src.utils import create_output_directories, format_spanish_date_from_path
 
+def process_one(
+    filename: str,
+    input_folder: str,
+    output_folder: str,
+    background_music_path: str,
+    background_image_path: str,
+    hw_encoder: str = "libx264",
+    threads: Optional[int] = None,
+    max_concurrent_requests: int = MAX_CONCURRENT_REQUESTS
+) -> str:
+    """
+    Run the full pipeline (HTML -> audio -> subtitles -> video) for a single file.
+    Components are built inside the worker so nothing heavy has to be pickled.
+    threads and max_concurrent_requests are this worker's share of the CPU and of the TTS service.
+    """
+    logger = Logger()
+    preprocessor = DocumentProcessor()
+    audiogenerator = TTSEngine(
+        cache_dir=os.path.join(output_folder, "cache"),
+        max_concurrent_requests=max_concurrent_requests
+    )
+    videocreator = VideoCreator(
+        output_folder=f'{output_folder}/video', logger=logger, hw_encoder=hw_encoder, threads=threads
+    )
+
+    file_path = os.path.join(input_folder, filename)
+
+    # Process HTML to audio
+    logger.print(f"Processing: {filename}", color="yellow")
+    html_tuples = preprocessor.process_file(file_path, save_transcript=False)
+    logger.print(f"HTML processed: {len(html_tuples)} tuples", color="green")
+
+    # Generate audio file and subtitles (transcribed while the audio is synthesized)
+    logger.print("Generating audio and subtitles...", color="blue")
+    base_name = os.path.splitext(filename)[0]
+    audio_path = os.path.join(output_folder, "audio", f"{base_name}.wav")
+    srt_path = os.path.join(output_folder, "subtitles", f"{base_name}.srt")
+    lang = audiogenerator.text_to_audio_with_srt(html_tuples, audio_path, srt_path)
+    logger.print(f"Audio created: {audio_path}. Detected language: {lang}", color="green")
+    logger.print(f"Subtitles created: {srt_path}", color="green")
+
+    # Create video
+    video_path = os.path.join(output_folder, "video", f"{base_name}.mp4")
+    date_title = format_spanish_date_from_path(input_folder) or "Sample Content"
+
+    logger.print("Creating video...", color="blue")
+    videocreator.create_video(
+        voice_path=audio_path,
+        background_music_path=background_music_path,
+        picture_path=background_image_path,
+        srt_file=srt_path,
+        text=date_title,
+        output_path=video_path
+    )
+    logger.print(f"Video created: {video_path}", color="green")
+    return video_path
+
 def main():
     # Configuration
     input_folder = "data/example"
     output_folder = "data/example/output"
     background_music_path = "data/example/background_music.mp3"
     background_image_path = "data/example/background_image.jpg"
-    
+
     # Create output directories
     create_output_directories(output_folder)
-    
-    # Initialize components
+
     logger = Logger()
-    preprocessor = DocumentProcessor()
-    audiogenerator = TTSEngine()
-    videocreator = VideoCreator(output_folder=f'{output_folder}/video', logger=logger)
-    
-    # Process each HTML file
-    for filename in os.listdir(input_folder):
-        if filename.lower().endswith('.html'):
-            file_path = os.path.join(input_folder, filename)
-            
-            # Process HTML to audio
-            logger.print(f"Processing: {filename}", color="yellow")
-            html_tuples = preprocessor.process_file(file_path, save_transcript=False)
-            logger.print(f"HTML processed: {len(html_tuples)} tuples", color="green")
-            
-            # Generate audio file
-            logger.print("Generating audio...", color="blue")
-            base_name = os.path.splitext(filename)[0]
-            audio_path = os.path.join(output_folder, "audio", f"{base_name}.wav")
-            lang = audiogenerator.text_to_audio(html_tuples, audio_path)
-            logger.print(f"Audio created: {audio_path}. Detected language: {lang}", color="green")
-            
-            # Generate subtitles
-            logger.print("Generating subtitles...", color="blue")
-            srt_path = os.path.join(output_folder, "subtitles", f"{base_name}.srt")
-            audiogenerator.create_srt_file(audio_path, srt_path, language='es')
-            logger.print(f"Subtitles created: {srt_path}", color="green")
-            
-            # Create video
-            video_path = os.path.join(output_folder, "video", f"{base_name}.mp4")
-            date_title = format_spanish_date_from_path(input_folder) or "Sample Content"
-            
-            logger.print("Creating video...", color="blue")
-            videocreator.create_video(
-                voice_path=audio_path,
-                background_music_path=background_music_path,
-                picture_path=background_image_path,
-                srt_file=srt_path,
-                text=date_title,
-                output_path=video_path
-            )
-            logger.print(f"Video created: {video_path}", color="green")
-    
+    files = [f for f in os.listdir(input_folder) if f.lower().endswith('.html')]
+    if not files:
+        logger.print(f"No HTML files found in {input_folder}", color="yellow")
+        return
+
+    # Use a hardware video encoder when one is available
+    hw_encoder = detect_hw_encoder()
+    logger.print(f"Video encoder: {hw_encoder}", color="gray")
+
+    # Process each HTML file in its own worker process; the workers split the
+    # encoder threads and the Edge TTS requests instead of each using all of them
+    max_workers = min(os.cpu_count() or 1, len(files))
+    worker = partial(
+        process_one,
+        input_folder=input_folder,
+        output_folder=output_folder,
+        background_music_path=background_music_path,
+        background_image_path=background_image_path,
+        hw_encoder=hw_encoder,
+        threads=max(1, (os.cpu_count() or 1) // max_workers),
+        max_concurrent_requests=max(1, MAX_CONCURRENT_REQUESTS // max_workers)
+    )
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(worker, files))
+
     logger.print("All files processed successfully!", color="green")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
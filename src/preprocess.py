@@ -1,11 +1,13 @@
 import os
 import re
 import logging
-from typing import List, Tuple, Optional, Dict, Set, Union
+from typing import List, Tuple, Optional, Dict
 from pathlib import Path
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
 import ebooklib
 from ebooklib import epub
-from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4 import BeautifulSoup, Tag
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -21,6 +23,9 @@ class DocumentProcessor:
         'fr': re.compile(r'chapitre|section|partie', re.IGNORECASE),
         'de': re.compile(r'kapitel|abschnitt|teil', re.IGNORECASE)
     }
+
+    # Runs of whitespace or non-printable characters (collapsed to a single space)
+    CLEAN_PATTERN = re.compile(r'(?:\s|[^\x20-\x7E\u00A0-\u024F\u1E00-\u1EFF])+')
     
     def __init__(self, language: str = 'es'):
         """
@@ -42,11 +47,20 @@ class DocumentProcessor:
         Returns:
             Cleaned text
         """
-        # Remove extra whitespace and normalize
-        text = re.sub(r'\s+', ' ', text).strip()
-        # Remove non-printable characters except common punctuation
-        text = re.sub(r'[^\x20-\x7E\u00A0-\u024F\u1E00-\u1EFF]', ' ', text)
-        return text
+        # Collapse whitespace and non-printable characters in a single pass
+        return self.CLEAN_PATTERN.sub(' ', text).strip()
+
+    def _tag_text(self, tag: Tag) -> str:
+        """
+        Extract the cleaned text of a tag (shared by the HTML and EPUB paths).
+        
+        Args:
+            tag: BeautifulSoup tag
+            
+        Returns:
+            Cleaned text; words split across inline tags (pala<em>bra</em>) stay joined
+        """
+        return self._clean_text(tag.get_text())
 
     def _is_valid_content(self, text: str, min_length: int = 3) -> bool:
         """
@@ -62,9 +76,10 @@ class DocumentProcessor:
         if not text or len(text.strip()) < min_length:
             return False
         
-        # Check if text contains mostly non-alphanumeric characters
-        alpha_count = sum(1 for char in text if char.isalpha())
-        if alpha_count < min_length:
+        # Check if text contains mostly non-alphanumeric characters;
+        # stops scanning as soon as min_length letters have been found
+        letters = filter(str.isalpha, text)
+        if min_length > 0 and next(islice(letters, min_length - 1, None), None) is None:
             return False
             
         return True
@@ -87,11 +102,11 @@ class DocumentProcessor:
             
             for item in book.get_items_of_type(ebooklib.ITEM_DOCUMENT):
                 try:
-                    soup = BeautifulSoup(item.get_content(), 'html.parser')
+                    soup = BeautifulSoup(item.get_content(), 'lxml')
                     
                     # Process all relevant tags
                     for tag in soup.find_all(list(self.HTML_TAGS)):
-                        text = self._clean_text(tag.get_text())
+                        text = self._tag_text(tag)
                         
                         if not self._is_valid_content(text):
                             continue
@@ -132,30 +147,17 @@ class DocumentProcessor:
             with open(file_path, 'r', encoding='utf-8') as f:
                 html = f.read()
 
-            soup = BeautifulSoup(html, 'html.parser')
+            soup = BeautifulSoup(html, 'lxml')
             logger.info(f"Processing HTML: {file_path}")
 
-            def process_element(element: Tag, depth: int = 0) -> None:
-                """Recursively process HTML elements."""
-                if depth > 10:  # Prevent infinite recursion
-                    return
-                    
-                # Process current element if it's a relevant tag
-                if element.name in self.HTML_TAGS:
-                    text = self._clean_text(element.get_text())
-                    
-                    if self._is_valid_content(text):
-                        result.append((element.name, text))
-                        transcript.append(text)
-                
-                # Process children recursively
-                for child in element.children:
-                    if isinstance(child, Tag):
-                        process_element(child, depth + 1)
-
-            # Start processing from body or root
+            # Process all relevant tags (document order) from body or root
             start_element = soup.body or soup
-            process_element(start_element)
+            for tag in start_element.find_all(list(self.HTML_TAGS)):
+                text = self._tag_text(tag)
+
+                if self._is_valid_content(text):
+                    result.append((tag.name, text))
+                    transcript.append(text)
             
             # Save transcript if requested
             if save_transcript and transcript:
@@ -186,16 +188,22 @@ class DocumentProcessor:
         result: List[Tuple[str, str]] = []
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            # Split into paragraphs (empty lines as separators)
-            paragraphs = re.split(r'\n\s*\n', content)
-            
-            for paragraph in paragraphs:
-                text = self._clean_text(paragraph)
+            def flush(lines: List[str]) -> None:
+                text = self._clean_text(' '.join(lines))
                 if self._is_valid_content(text):
                     result.append(('p', text))
+
+            # Stream paragraphs line by line (empty lines as separators)
+            paragraph: List[str] = []
+            with open(file_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        paragraph.append(line)
+                    elif paragraph:
+                        flush(paragraph)
+                        paragraph = []
+            if paragraph:
+                flush(paragraph)
                     
         except Exception as e:
             logger.error(f"Failed to process text file {file_path}: {e}")
@@ -242,13 +250,21 @@ class DocumentProcessor:
             logger.error(f"Error processing file {file_path}: {e}")
             raise
 
-    def batch_process(self, directory_path: str, extensions: List[str] = None) -> Dict[str, List[Tuple[str, str]]]:
+    def batch_process(
+        self,
+        directory_path: str,
+        extensions: List[str] = None,
+        max_workers: Optional[int] = None
+    ) -> Dict[str, List[Tuple[str, str]]]:
         """
         Process all supported files in a directory.
         
+        Files are independent, so they are processed in parallel worker processes.
+        
         Args:
             directory_path: Path to directory containing files
             extensions: List of file extensions to process (default: all supported)
+            max_workers: Maximum number of worker processes (default: os.cpu_count())
             
         Returns:
             Dictionary mapping filenames to their processed content
@@ -262,18 +278,47 @@ class DocumentProcessor:
         if not directory_path.exists():
             raise FileNotFoundError(f"Directory not found: {directory_path}")
             
-        for ext in extensions:
-            for file_path in directory_path.glob(f'*{ext}'):
-                if file_path.is_file():
-                    try:
-                        content = self.process_file(str(file_path))
-                        results[file_path.name] = content
-                    except Exception as e:
-                        logger.warning(f"Skipping file {file_path}: {e}")
-                        continue
+        # One directory scan; str.endswith checks all extensions in a single call
+        # (case-insensitive, so 'Book.HTML' is picked up like on Windows)
+        ext_tuple = tuple(ext.lower() for ext in extensions)
+        with os.scandir(directory_path) as entries:
+            file_paths = [
+                Path(entry.path)
+                for entry in entries
+                if entry.is_file() and entry.name.lower().endswith(ext_tuple)
+            ]
+        if not file_paths:
+            return results
+
+        # A single file is not worth the worker process startup
+        if len(file_paths) == 1:
+            file_path = file_paths[0]
+            try:
+                results[file_path.name] = self.process_file(str(file_path))
+            except Exception as e:
+                logger.warning(f"Skipping file {file_path}: {e}")
+            return results
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                (file_path, executor.submit(_process_file_worker, str(file_path), self.language))
+                for file_path in file_paths
+            ]
+            # Collect in submission order so the result order is deterministic
+            for file_path, future in futures:
+                try:
+                    results[file_path.name] = future.result()
+                except Exception as e:
+                    logger.warning(f"Skipping file {file_path}: {e}")
+                    continue
                         
         return results
 
+
+def _process_file_worker(file_path: str, language: str) -> List[Tuple[str, str]]:
+    """Process a single file in a worker process (module level so it can be pickled)."""
+    return DocumentProcessor(language).process_file(file_path)
+
 # Example usage and quick test
 if __name__ == '__main__':
     # Configure logging
@@ -1,11 +1,16 @@
 import os
-import json
 import wave
+import mmap
 import asyncio
 import re
-from typing import List, Tuple, Union, Optional
+import functools
+import subprocess
+import hashlib
+import shutil
+from typing import AsyncIterator, Iterable, List, Tuple, Union, Optional
+from concurrent.futures import ThreadPoolExecutor
 import edge_tts
-from pydub import AudioSegment
+import orjson
 from vosk import Model, KaldiRecognizer
 
 
@@ -14,11 +19,49 @@ def format_srt_time(seconds: float) -> str:
     Convert seconds into SRT time format (HH:MM:SS,mmm).
     Example: 65.32 -> "00:01:05,320"
     """
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    millis = int((seconds - int(seconds)) * 1000)
-    return f"{hours:02}:{minutes:02}:{secs:02},{millis:03}"
+    whole_seconds = int(seconds)
+    millis = int((seconds - whole_seconds) * 1000)
+    minutes, secs = divmod(whole_seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return "%02d:%02d:%02d,%03d" % (hours, minutes, secs, millis)
+
+
+# Sample rate of the PCM audio fed to Vosk
+VOSK_SAMPLE_RATE = 16000
+
+# Inputs with at least this many parts are synthesized with concurrent Edge TTS requests
+MIN_PARTS_FOR_CONCURRENCY = 3
+MAX_CONCURRENT_REQUESTS = 8
+
+
+def find_wav_data(buffer: Union[bytes, mmap.mmap]) -> Tuple[int, int]:
+    """
+    Locate the PCM samples inside a RIFF/WAVE buffer.
+    Streamed WAVs may declare an unknown data size, so the end is clamped to the buffer.
+    :return: (start, end) byte offsets of the 'data' chunk.
+    """
+    if buffer[:4] != b"RIFF" or buffer[8:12] != b"WAVE":
+        raise ValueError("Audio must be a RIFF/WAVE file.")
+
+    offset = 12
+    while offset + 8 <= len(buffer):
+        chunk_id = buffer[offset:offset + 4]
+        chunk_size = int.from_bytes(buffer[offset + 4:offset + 8], "little")
+        offset += 8
+        if chunk_id == b"data":
+            return offset, min(offset + chunk_size, len(buffer))
+        offset += chunk_size + (chunk_size & 1)  # Chunks are word-aligned
+
+    raise ValueError("WAV file has no data chunk.")
+
+
+@functools.lru_cache(maxsize=2)
+def get_vosk_model(model_path: str) -> Model:
+    """
+    Load a Vosk model once per process and reuse it on later calls.
+    Loading a model reads hundreds of MB from disk, so it is cached by path.
+    """
+    return Model(model_path)
 
 
 def convert_to_wav(input_path: str, output_path: str) -> None:
@@ -26,9 +69,15 @@ def convert_to_wav(input_path: str, output_path: str) -> None:
     Convert an audio file into mono WAV at 16kHz (recommended for Vosk).
     Supports formats like mp3, ogg, flac, etc.
     """
-    audio = AudioSegment.from_file(input_path)
-    audio = audio.set_channels(1).set_frame_rate(16000)
-    audio.export(output_path, format="wav")
+    subprocess.run(
+        [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-i", input_path,
+            "-ac", "1", "-ar", "16000", "-acodec", "pcm_s16le",
+            output_path
+        ],
+        check=True
+    )
 
 
 class TTSEngine:
@@ -38,11 +87,49 @@ class TTSEngine:
     - Exports transcription with timestamps in SRT format.
     """
 
-    def __init__(self, pace: float = 1.15, volume: float = 1.0) -> None:
+    # Text is split into words once; each word is then a set lookup per language
+    _WORD_PATTERN = re.compile(r'\w+')
+
+    # Spanish accented characters and common words
+    _SPANISH_CHARS = 'áéíóúñü'
+    _SPANISH_WORDS = frozenset({
+        'y', 'el', 'la', 'los', 'las', 'un', 'una', 'unos', 'unas', 'es', 'son', 'soy', 'eres', 'somos', 'sois',
+        'que', 'de', 'no', 'a', 'en', 'por', 'con', 'para', 'mi', 'tu', 'su', 'nuestro', 'vuestro'
+    })
+
+    # Common English words and suffixes
+    _ENGLISH_WORDS = frozenset({
+        'the', 'and', 'you', 'that', 'for', 'with', 'are', 'this', 'from', 'have',
+        'ing', 'ed', 'tion', 'ment', 'able', 'ible', 'ness', 'ship', 'hood', 'dom'
+    })
+
+    _COMMON_SPANISH_WORDS = ('hola', 'gracias', 'por favor', 'adiós', 'buenos días', 'buenas tardes', 'buenas noches')
+    _COMMON_ENGLISH_WORDS = ('hello', 'thank you', 'please', 'goodbye', 'good morning', 'good afternoon', 'good evening')
+
+    # Tag -> (prefix, suffix) pauses added around the text
+    _TAG_FORMATS = {
+        "h1": (". . . ", ". . ."),
+        "h2": (". . ", ". ."),
+        "h3": (". ", ". "),
+        "h4": (". ", ". "),
+        "h5": (". ", ". "),
+        "h6": (". ", ". "),
+    }
+    _DEFAULT_TAG_FORMAT = ("", ". ")
+
+    def __init__(
+        self,
+        pace: float = 1.15,
+        volume: float = 1.0,
+        cache_dir: Optional[str] = None,
+        max_concurrent_requests: int = MAX_CONCURRENT_REQUESTS
+    ) -> None:
         """
         Initialize the TTS engine.
         :param pace: Speaking rate multiplier (0 < pace < 2).
         :param volume: Volume multiplier (0 < volume < 2).
+        :param cache_dir: Folder for cached synthesized audio. If None, caching is disabled.
+        :param max_concurrent_requests: Maximum simultaneous Edge TTS requests per text.
         """
         if not (0 < pace < 2):
             raise ValueError("Pace must be between 0 and 2.")
@@ -51,51 +138,24 @@ class TTSEngine:
 
         self.pace = int((pace - 1) * 100)  # Edge TTS expects percentage change
         self.volume = int((volume - 1) * 100)
+        self.cache_dir = cache_dir
+        self.max_concurrent_requests = max(1, max_concurrent_requests)
 
     def _detect_language_from_text(self, text: str) -> str:
         """
         Detect language from text using common character patterns.
         Returns 'es' for Spanish, 'en' for English, or defaults to 'en'.
         """
-        # Common Spanish characters and patterns
-        spanish_patterns = [
-            r'[áéíóúñü]',  # Spanish accented characters
-            r'\b(y|el|la|los|las|un|una|unos|unas|es|son|soy|eres|es|somos|sois|son)\b',
-            r'\b(que|de|no|a|en|por|con|para|mi|tu|su|nuestro|vuestro|su)\b'
-        ]
-        
-        # Common English patterns
-        english_patterns = [
-            r'\b(the|and|you|that|for|with|are|this|from|have)\b',
-            r'\b(ing|ed|tion|ment|able|ible|ness|ship|hood|dom)\b'  # Common English suffixes
-        ]
-        
-        spanish_score = 0
-        english_score = 0
-        
         text_lower = text.lower()
-        
-        # Check for Spanish patterns
-        for pattern in spanish_patterns:
-            matches = re.findall(pattern, text_lower, re.IGNORECASE)
-            spanish_score += len(matches)
-        
-        # Check for English patterns
-        for pattern in english_patterns:
-            matches = re.findall(pattern, text_lower, re.IGNORECASE)
-            english_score += len(matches)
-        
-        # Also check for common Spanish words that might not be caught by patterns
-        common_spanish_words = ['hola', 'gracias', 'por favor', 'adiós', 'buenos días', 'buenas tardes', 'buenas noches']
-        for word in common_spanish_words:
-            if word in text_lower:
-                spanish_score += 3
-        
-        # Also check for common English words
-        common_english_words = ['hello', 'thank you', 'please', 'goodbye', 'good morning', 'good afternoon', 'good evening']
-        for word in common_english_words:
-            if word in text_lower:
-                english_score += 3
+        words = self._WORD_PATTERN.findall(text_lower)
+
+        spanish_score = sum(map(text_lower.count, self._SPANISH_CHARS))
+        spanish_score += sum(map(self._SPANISH_WORDS.__contains__, words))
+        english_score = sum(map(self._ENGLISH_WORDS.__contains__, words))
+
+        # Also check for common words that might not be caught by patterns
+        spanish_score += 3 * sum(word in text_lower for word in self._COMMON_SPANISH_WORDS)
+        english_score += 3 * sum(word in text_lower for word in self._COMMON_ENGLISH_WORDS)
         
         # Return the detected language
         if spanish_score > english_score and spanish_score > 2:
@@ -123,31 +183,29 @@ class TTSEngine:
         Convert HTML-like (tag, text) tuples into plain text with pauses.
         Adds extra pauses based on tag importance (h1 > h2 > h3, etc.).
         """
+        return " ".join(self._html_tuples_to_parts(tuples)).strip()
+
+    def _html_tuples_to_parts(self, tuples: Union[Tuple[str, str], List[Tuple[str, str]]]) -> List[str]:
+        """
+        Convert HTML-like (tag, text) tuples into one text part per tuple,
+        with pauses added around each part based on tag importance.
+        """
         parts = []
         for tag, text in tuples:
-            if tag == "h1":
-                part = f". . . {text}. . ."
-            elif tag == "h2":
-                part = f". . {text}. ."
-            elif tag in {"h3", "h4", "h5", "h6"}:
-                part = f". {text}. "
-            else:
-                part = f"{text}. "
-            parts.append(part)
-        return " ".join(parts).strip()
+            prefix, suffix = self._TAG_FORMATS.get(tag, self._DEFAULT_TAG_FORMAT)
+            parts.append(f"{prefix}{text}{suffix}")
+        return parts
 
-    def text_to_audio(
-        self, 
-        html_tuples: Union[Tuple[str, str], List[Tuple[str, str]]], 
-        output_path: str,
+    def _prepare_text(
+        self,
+        html_tuples: Union[Tuple[str, str], List[Tuple[str, str]]],
         language: Optional[str] = None
-    ) -> str:
+    ) -> Tuple[List[str], str, str]:
         """
-        Convert structured text into audio (mp3 + wav).
-        :param html_tuples: List of (tag, text) pairs, e.g. [("h1", "Title"), ("p", "Content")].
-        :param output_path: Output mp3 path. A WAV copy is also generated.
-        :param language: Language code ("es" for Spanish, "en" for English). If None, auto-detects.
-        :return: Detected language code
+        Validate (tag, text) tuples and convert them to plain text.
+        :param html_tuples: List of (tag, text) pairs.
+        :param language: Language code ("es" or "en"). If None, auto-detects.
+        :return: Tuple of (text parts, joined plain text, language code)
         """
         if not isinstance(html_tuples, (tuple, list)) or not html_tuples:
             raise ValueError("Input must be a non-empty tuple or list of (tag, text).")
@@ -160,7 +218,8 @@ class TTSEngine:
                 raise TypeError(f"Text at index {i} must be str, got {type(text)}.")
 
         # Convert to plain text for language detection
-        plain_text = self._html_tuples_to_text(html_tuples)
+        parts = self._html_tuples_to_parts(html_tuples)
+        plain_text = " ".join(parts).strip()
         
         # Auto-detect language if not specified
         if language is None:
@@ -169,35 +228,239 @@ class TTSEngine:
         if language not in {"es", "en"}:
             raise ValueError("Language must be 'es' or 'en'.")
 
+        return parts, plain_text, language
+
+    def detect_language(
+        self,
+        html_tuples: Union[Tuple[str, str], List[Tuple[str, str]]],
+        language: Optional[str] = None
+    ) -> str:
+        """
+        Validate structured text and resolve its language without synthesizing any audio.
+        :param html_tuples: List of (tag, text) pairs.
+        :param language: Language code ("es" or "en"). If None, auto-detects.
+        :return: Language code that text_to_audio would use
+        """
+        return self._prepare_text(html_tuples, language)[2]
+
+    def text_to_audio(
+        self, 
+        html_tuples: Union[Tuple[str, str], List[Tuple[str, str]]], 
+        output_path: str,
+        language: Optional[str] = None
+    ) -> str:
+        """
+        Convert structured text into audio (mp3, or a 16kHz mono WAV for transcription).
+        :param html_tuples: List of (tag, text) pairs, e.g. [("h1", "Title"), ("p", "Content")].
+        :param output_path: Output path. A .wav path produces a WAV; any other path gets the mp3.
+        :param language: Language code ("es" for Spanish, "en" for English). If None, auto-detects.
+        :return: Detected language code
+        """
+        parts, plain_text, language = self._prepare_text(html_tuples, language)
         voice = self._get_voice_for_language(language)
-        
-        mp3_path = output_path.replace(".wav", ".mp3")
-        asyncio.run(self._generate_audio(plain_text, mp3_path, voice))
 
-        # Convert audio to wav for transcription if needed
+        # Reuse previously synthesized audio for identical inputs
+        cache_path = self._get_cache_path(plain_text, voice, output_path)
+        if cache_path and os.path.exists(cache_path):
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            shutil.copyfile(cache_path, output_path)
+            return language
+        
         if output_path.endswith(".wav"):
-            convert_to_wav(mp3_path, output_path)
-            # Delete temp mp3 file
-            os.remove(mp3_path)
+            # Stream the synthesized audio straight into a WAV for transcription
+            asyncio.run(self._generate_wav(parts, output_path, voice))
+        else:
+            asyncio.run(self._generate_audio(parts, output_path, voice))
+
+        if cache_path:
+            self._store_in_cache(output_path, cache_path)
         
         return language
 
-    async def _generate_audio(self, text: str, output_path: str, voice: str) -> None:
-        """Internal async function to generate audio via Edge TTS."""
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        communicator = edge_tts.Communicate(
+    def text_to_audio_with_srt(
+        self,
+        html_tuples: Union[Tuple[str, str], List[Tuple[str, str]]],
+        output_path: str,
+        output_srt: Optional[str] = None,
+        language: Optional[str] = None,
+        segment_duration: Optional[float] = 4.0,
+        chunk_duration: float = 4.0
+    ) -> str:
+        """
+        Convert structured text into a WAV file and its SRT subtitles in one pass.
+        Vosk transcribes the audio from a pipe while Edge TTS is still synthesizing,
+        instead of waiting for the WAV file to be complete.
+        :param html_tuples: List of (tag, text) pairs, e.g. [("h1", "Title"), ("p", "Content")].
+        :param output_path: Output WAV path.
+        :param output_srt: Output path for SRT file. Defaults to output_path with .srt extension.
+        :param language: Language code ("es" for Spanish, "en" for English). If None, auto-detects.
+        :param segment_duration: If provided, subtitles are cut every N seconds.
+        :param chunk_duration: Length of audio (in seconds) fed to Vosk per iteration.
+        :return: Detected language code
+        """
+        if not output_path.endswith(".wav"):
+            raise ValueError("Output audio must be a WAV file.")
+
+        parts, plain_text, language = self._prepare_text(html_tuples, language)
+        voice = self._get_voice_for_language(language)
+        output_srt = output_srt or output_path.replace(".wav", ".srt")
+
+        # Cached audio is already complete, so there is nothing to overlap with
+        cache_path = self._get_cache_path(plain_text, voice, output_path)
+        model = self._load_vosk_model(language)
+        if (cache_path and os.path.exists(cache_path)) or model is None:
+            self.text_to_audio(html_tuples, output_path, language)
+            return self.create_srt_file(output_path, output_srt, language, segment_duration)
+
+        # ffmpeg writes the WAV file and a raw PCM copy into the pipe read by Vosk
+        read_fd, write_fd = os.pipe()
+
+        def transcribe() -> List[dict]:
+            with os.fdopen(read_fd, "rb") as stream:
+                chunk_bytes = int(chunk_duration * VOSK_SAMPLE_RATE) * 2
+                chunks = iter(lambda: stream.read(chunk_bytes), b"")
+                return self._recognize_chunks(model, chunks, VOSK_SAMPLE_RATE)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(transcribe)
+            synthesis_error = None
+            try:
+                asyncio.run(self._generate_wav(parts, output_path, voice, pcm_fd=write_fd))
+            except Exception as error:
+                synthesis_error = error
+            finally:
+                # Closing the write end signals end-of-stream to the transcriber
+                os.close(write_fd)
+
+            if synthesis_error is not None:
+                # A failing transcriber closes the pipe, which makes ffmpeg fail too;
+                # its own error is the real cause, so it is raised first
+                transcription_error = future.exception()
+                if transcription_error is not None:
+                    raise transcription_error from synthesis_error
+                raise synthesis_error
+            transcription = future.result()
+
+        if cache_path:
+            self._store_in_cache(output_path, cache_path)
+
+        self._write_srt(transcription, output_srt, segment_duration)
+        return language
+
+    def _get_cache_path(self, text: str, voice: str, output_path: str) -> Optional[str]:
+        """
+        Build the cache file path for a synthesis request, keyed on every input
+        that affects the audio. Returns None when caching is disabled.
+        """
+        if not self.cache_dir:
+            return None
+        extension = os.path.splitext(output_path)[1]
+        key = hashlib.blake2b(
+            f"{voice}|{self.pace}|{self.volume}|{extension}|{text}".encode("utf-8"),
+            digest_size=16
+        ).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}{extension}")
+
+    def _store_in_cache(self, audio_path: str, cache_path: str) -> None:
+        """Copy synthesized audio into the cache (atomically, so parallel workers never read partial files)."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        shutil.copyfile(audio_path, tmp_path)
+        os.replace(tmp_path, cache_path)
+
+    def _create_communicator(self, text: str, voice: str) -> edge_tts.Communicate:
+        """Build an Edge TTS communicator with the engine's pace and volume."""
+        return edge_tts.Communicate(
             text=text,
             voice=voice,
             rate=f"+{self.pace}%",
             volume=f"+{self.volume}%"
         )
-        await communicator.save(output_path)
+
+    async def _synthesize(self, parts: List[str], voice: str) -> AsyncIterator[bytes]:
+        """
+        Internal async generator yielding Edge TTS mp3 audio for the text parts, in order.
+        Short inputs are sent as a single request; longer ones are split into one
+        request per part, run concurrently (bounded by max_concurrent_requests),
+        and their mp3 frames are concatenated as each part becomes available.
+        """
+        if len(parts) < MIN_PARTS_FOR_CONCURRENCY:
+            communicator = self._create_communicator(" ".join(parts).strip(), voice)
+            async for chunk in communicator.stream():
+                if chunk["type"] == "audio":
+                    yield chunk["data"]
+            return
+
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+
+        async def synthesize_part(text: str) -> bytes:
+            async with semaphore:
+                communicator = self._create_communicator(text, voice)
+                return b"".join([
+                    chunk["data"] async for chunk in communicator.stream()
+                    if chunk["type"] == "audio"
+                ])
+
+        tasks = [asyncio.create_task(synthesize_part(part.strip())) for part in parts]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Wait for the cancelled requests to unwind and retrieve every outcome
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _generate_audio(self, parts: List[str], output_path: str, voice: str) -> None:
+        """Internal async function to generate audio via Edge TTS."""
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, "wb") as f:
+            async for data in self._synthesize(parts, voice):
+                f.write(data)
+
+    async def _generate_wav(
+        self,
+        parts: List[str],
+        output_path: str,
+        voice: str,
+        pcm_fd: Optional[int] = None
+    ) -> None:
+        """
+        Internal async function to generate a mono 16kHz WAV via Edge TTS.
+        Audio chunks are piped into ffmpeg as they arrive, so no intermediate
+        mp3 file is written and the download overlaps with the resampling.
+        :param pcm_fd: Optional file descriptor that also receives the audio as raw
+                       16-bit PCM while it is being written.
+        """
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        pcm_format = ["-ac", "1", "-ar", str(VOSK_SAMPLE_RATE), "-acodec", "pcm_s16le"]
+        command = [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-i", "pipe:0",
+            *pcm_format, "-f", "wav", output_path
+        ]
+        if pcm_fd is not None:
+            command += [*pcm_format, "-f", "s16le", "pipe:1"]
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=pcm_fd
+        )
+        try:
+            async for data in self._synthesize(parts, voice):
+                process.stdin.write(data)
+                await process.stdin.drain()
+        finally:
+            process.stdin.close()
+            returncode = await process.wait()
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg failed to write {output_path} (exit code {returncode}).")
 
     def _transcribe_with_timings(
         self,
         audio_path: str,
         language: str,
-        chunk_duration: float = 1.0
+        chunk_duration: float = 4.0
     ) -> Optional[List[dict]]:
         """
         Transcribe an audio file with word-level timings using Vosk.
@@ -209,6 +472,30 @@ class TTSEngine:
                                Larger values -> faster processing, but coarser segmentation.
         :return: List of transcription segments (dicts).
         """
+        model = self._load_vosk_model(language)
+        if model is None:
+            return None
+
+        with wave.open(audio_path, "rb") as wf:
+            if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getcomptype() != "NONE":
+                raise ValueError("Audio must be WAV mono PCM.")
+            framerate = wf.getframerate()
+
+        # Bytes per chunk = seconds * frames/sec * 2 bytes/frame
+        chunk_bytes = int(chunk_duration * framerate) * 2
+
+        # Memory-map the file and slice the PCM data directly, bypassing the wave reader
+        with open(audio_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            data_start, data_end = find_wav_data(mm)
+            chunks = (mm[offset:min(offset + chunk_bytes, data_end)] for offset in range(data_start, data_end, chunk_bytes))
+            return self._recognize_chunks(model, chunks, framerate)
+
+    def _load_vosk_model(self, language: str) -> Optional[Model]:
+        """
+        Get the (cached) Vosk model for a language.
+        :param language: "en" or "es".
+        :return: Vosk model, or None if the model is not downloaded.
+        """
         if language not in {"en", "es"}:
             raise ValueError(f"Language must be 'en' or 'es'. Got {language}")
 
@@ -217,29 +504,26 @@ class TTSEngine:
             print(f"⚠ Missing model at '{model_path}'. Download from https://alphacephei.com/vosk/models")
             return None
 
-        model = Model(model_path)
-
-        with wave.open(audio_path, "rb") as wf:
-            if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getcomptype() != "NONE":
-                raise ValueError("Audio must be WAV mono PCM.")
-
-            framerate = wf.getframerate()
-            # Frames per chunk = seconds * frames/sec
-            frames_per_chunk = int(chunk_duration * framerate)
+        return get_vosk_model(model_path)
 
-            recognizer = KaldiRecognizer(model, framerate)
-            recognizer.SetWords(True)  # Enable word-level timestamps
+    def _recognize_chunks(self, model: Model, chunks: Iterable[bytes], framerate: int) -> List[dict]:
+        """
+        Run Vosk over a stream of mono 16-bit PCM chunks.
+        :param model: Vosk model to use.
+        :param chunks: Iterable of raw PCM byte chunks.
+        :param framerate: Sample rate of the audio.
+        :return: List of transcription segments (dicts).
+        """
+        recognizer = KaldiRecognizer(model, framerate)
+        recognizer.SetWords(True)  # Enable word-level timestamps
 
-            results = []
-            while True:
-                data = wf.readframes(frames_per_chunk)
-                if not data:
-                    break
-                if recognizer.AcceptWaveform(data):
-                    results.append(json.loads(recognizer.Result()))
+        results = []
+        for data in chunks:
+            if recognizer.AcceptWaveform(data):
+                results.append(orjson.loads(recognizer.Result()))
 
-            results.append(json.loads(recognizer.FinalResult()))
-            return results
+        results.append(orjson.loads(recognizer.FinalResult()))
+        return results
 
     def create_srt_file(
         self,
@@ -281,54 +565,64 @@ class TTSEngine:
         if not transcription:
             raise RuntimeError("Failed to transcribe audio.")
 
+        self._write_srt(transcription, output_srt, segment_duration)
+        return language
+
+    def _write_srt(
+        self,
+        transcription: List[dict],
+        output_srt: str,
+        segment_duration: Optional[float] = 4.0
+    ) -> None:
+        """
+        Write Vosk transcription segments into an SRT file.
+        :param transcription: List of transcription segments (dicts).
+        :param output_srt: Output path for SRT file.
+        :param segment_duration: If provided, subtitles are cut every N seconds.
+        """
         # Collect all words with timings
         words = []
         for segment in transcription:
             for w in segment.get("result", []):
                 words.append(w)
         
+        # Collect (start, end, text) subtitle entries
+        entries: List[Tuple[float, float, str]] = []
+        if segment_duration:
+            # Fixed-time segmentation
+            segment_start = 0.0
+            current_words = []
+
+            for word in words:
+                # If the word passes the current segment limit, flush the segment
+                if word["start"] >= segment_start + segment_duration and current_words:
+                    entries.append((segment_start, current_words[-1]["end"], " ".join(w["word"] for w in current_words)))
+                    segment_start += segment_duration
+                    current_words = []
+
+                current_words.append(word)
+
+            # Flush the last segment
+            if current_words:
+                entries.append((segment_start, current_words[-1]["end"], " ".join(w["word"] for w in current_words)))
+
+        else:
+            # Natural segmentation (default Vosk behavior)
+            for segment in transcription:
+                if not segment.get("result"):
+                    continue
+
+                entries.append((
+                    segment["result"][0]["start"],
+                    segment["result"][-1]["end"],
+                    " ".join(word["word"] for word in segment["result"])
+                ))
+
+        # Build the whole file in memory and write it once
+        srt_content = "".join(
+            "%d\n%s --> %s\n%s\n\n" % (i, format_srt_time(start), format_srt_time(end), text)
+            for i, (start, end, text) in enumerate(entries, start=1)
+        )
         os.makedirs(os.path.dirname(output_srt), exist_ok=True)
         with open(output_srt, "w", encoding="utf-8") as f:
-            if segment_duration:
-                # Fixed-time segmentation
-                i, segment_start = 1, 0.0
-                current_words = []
-
-                for word in words:
-                    word_start = word["start"]
-                    word_end = word["end"]
-
-                    # If the word passes the current segment limit, flush the segment
-                    if word_start >= segment_start + segment_duration and current_words:
-                        f.write(f"{i}\n")
-                        f.write(f"{format_srt_time(segment_start)} --> {format_srt_time(current_words[-1]['end'])}\n")
-                        f.write(" ".join(w["word"] for w in current_words) + "\n\n")
-                        i += 1
-                        segment_start += segment_duration
-                        current_words = []
-
-                    current_words.append(word)
-
-                # Flush the last segment
-                if current_words:
-                    f.write(f"{i}\n")
-                    f.write(f"{format_srt_time(segment_start)} --> {format_srt_time(current_words[-1]['end'])}\n")
-                    f.write(" ".join(w["word"] for w in current_words) + "\n\n")
-
-            else:
-                # Natural segmentation (default Vosk behavior)
-                i = 1
-                for segment in transcription:
-                    if not segment.get("result"):
-                        continue
-
-                    start_time = segment["result"][0]["start"]
-                    end_time = segment["result"][-1]["end"]
-                    text = " ".join(word["word"] for word in segment["result"])
-
-                    f.write(f"{i}\n")
-                    f.write(f"{format_srt_time(start_time)} --> {format_srt_time(end_time)}\n")
-                    f.write(f"{text}\n\n")
-                    i += 1
-        
-        return language
\ No newline at end of file
+            f.write(srt_content)
@@ -4,10 +4,17 @@ Utility functions for file processing and date formatting.
 
 import os
 import re
-import locale
+import functools
 from datetime import datetime
 from typing import Optional
 from pathlib import Path
+from babel.dates import format_date
+
+# Subfolders created inside the output folder
+OUTPUT_SUBFOLDERS = ("audio", "subtitles", "video")
+
+# 6-digit date pattern (YYMMDD)
+_DATE_PATTERN = re.compile(r'(\d{6})')
 
 def create_output_directories(output_folder: str) -> None:
     """
@@ -16,16 +23,18 @@ def create_output_directories(output_folder: str) -> None:
     Args:
         output_folder: Base output directory path
     """
-    directories = [
-        output_folder,
-        os.path.join(output_folder, "audio"),
-        os.path.join(output_folder, "subtitles"), 
-        os.path.join(output_folder, "video")
-    ]
-    
-    for directory in directories:
-        os.makedirs(directory, exist_ok=True)
+    # Only the base folder may need its parents created; the subfolders need a single mkdir each
+    os.makedirs(output_folder, exist_ok=True)
+    for subfolder in OUTPUT_SUBFOLDERS:
+        path = os.path.join(output_folder, subfolder)
+        try:
+            os.mkdir(path)
+        except FileExistsError:
+            # Like makedirs(exist_ok=True), only an existing directory is acceptable
+            if not os.path.isdir(path):
+                raise
 
+@functools.lru_cache(maxsize=4096)
 def extract_date_from_path(path: str) -> Optional[str]:
     """
     Extract date string from path using pattern matching.
@@ -37,9 +46,10 @@ def extract_date_from_path(path: str) -> Optional[str]:
         Date string in YYMMDD format or None if not found
     """
     # Look for 6-digit date patterns (YYMMDD)
-    match = re.search(r'(\d{6})', os.path.basename(path))
+    match = _DATE_PATTERN.search(os.path.basename(path))
     return match.group(1) if match else None
 
+@functools.lru_cache(maxsize=4096)
 def format_spanish_date(date_str: str) -> Optional[str]:
     """
     Format a date string (YYMMDD) into Spanish text format.
@@ -52,23 +62,14 @@ def format_spanish_date(date_str: str) -> Optional[str]:
     """
     try:
         date_obj = datetime.strptime(date_str, "%y%m%d")
-        
-        # Try to set Spanish locale
-        try:
-            locale.setlocale(locale.LC_TIME, 'es_ES.UTF-8')
-        except locale.Error:
-            try:
-                locale.setlocale(locale.LC_TIME, 'Spanish_Spain')
-            except locale.Error:
-                # Fallback to English if Spanish locale not available
-                return date_obj.strftime("%d %B %Y")
-        
-        formatted = date_obj.strftime("%d %B %Y").capitalize()
-        return formatted
-        
     except ValueError:
         return None
 
+    # CLDR month names from Babel: no process-wide setlocale() and no dependency
+    # on the Spanish locale being installed on the system
+    return format_date(date_obj, "dd MMMM y", locale="es_ES").capitalize()
+
+@functools.lru_cache(maxsize=4096)
 def format_spanish_date_from_path(path: str) -> Optional[str]:
     """
     Extract and format date from path into Spanish text.
@@ -96,13 +97,15 @@ def get_available_files(directory: str, extensions: list) -> list:
     Returns:
         List of file paths matching the extensions
     """
-    if not os.path.exists(directory):
+    ext_tuple = tuple(ext.lower() for ext in extensions)
+    try:
+        with os.scandir(directory) as entries:
+            return [
+                entry.path for entry in entries
+                if entry.is_file() and entry.name.lower().endswith(ext_tuple)
+            ]
+    except FileNotFoundError:
         return []
-        
-    return [
-        os.path.join(directory, f) for f in os.listdir(directory)
-        if any(f.lower().endswith(ext) for ext in extensions)
-    ]
 
 def validate_file_path(file_path: str, file_type: str = "file") -> bool:
     """
@@ -119,4 +122,4 @@ def validate_file_path(file_path: str, file_type: str = "file") -> bool:
         return os.path.isfile(file_path)
     elif file_type == "directory":
         return os.path.isdir(file_path)
-    return os.path.exists(file_path)
\ No newline at end of file
+    return os.path.exists(file_path)
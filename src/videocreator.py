@@ -1,24 +1,203 @@
-from icecream import ic
-from moviepy.editor import (
-    AudioFileClip,
-    ImageClip,
-    TextClip,
-    CompositeVideoClip,
-    CompositeAudioClip,
-)
+# Imported from their own modules: moviepy.editor would also load every fx module
+# and the preview backends at import time, none of which are used here
+from moviepy.audio.io.AudioFileClip import AudioFileClip
+from moviepy.audio.AudioClip import CompositeAudioClip
+from moviepy.video.VideoClip import ImageClip
+from moviepy.video.compositing.CompositeVideoClip import CompositeVideoClip
 from moviepy.video.tools.subtitles import file_to_subtitles, SubtitlesClip
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from src.logger import Logger
 import os
-from moviepy.config import change_settings
-change_settings({"IMAGEMAGICK_BINARY": r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe"})
+import re
+import math
+import wave
+import shutil
+import functools
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from moviepy.config import get_setting
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+# Encoder -> (preset, extra ffmpeg params) used when writing the final video.
+# MoviePy always passes -preset; VAAPI ignores it, so MoviePy's default is kept.
+VIDEO_ENCODERS = {
+    # The background is a still image, so x264 can spend almost nothing per frame
+    "libx264": ("veryfast", ["-tune", "stillimage", "-crf", "23"]),
+    "h264_nvenc": ("p4", ["-tune", "hq", "-pix_fmt", "yuv420p"]),
+    "h264_vaapi": ("medium", [
+        "-init_hw_device", "vaapi=hw:/dev/dri/renderD128",
+        "-filter_hw_device", "hw",
+        "-vf", "format=nv12,hwupload"
+    ]),
+}
+
+
+def _ffmpeg_can_encode(ffmpeg: str, encoder: str) -> bool:
+    """Check that ffmpeg lists an encoder and can encode a test clip with its VIDEO_ENCODERS settings"""
+    preset, params = VIDEO_ENCODERS[encoder]
+    try:
+        listing = subprocess.run(
+            [ffmpeg, "-hide_banner", "-encoders"],
+            capture_output=True, text=True, timeout=10, check=True
+        )
+        if f" {encoder} " not in listing.stdout:
+            return False
+
+        # NVENC rejects very small frames, so the test frame is not tiny
+        subprocess.run(
+            [
+                ffmpeg, "-hide_banner", "-loglevel", "error",
+                "-f", "lavfi", "-i", "color=s=256x256:d=0.1",
+                "-c:v", encoder, "-preset", preset, *params,
+                "-f", "null", "-"
+            ],
+            capture_output=True, timeout=30, check=True
+        )
+        return True
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+
+@functools.lru_cache(maxsize=1)
+def detect_hw_encoder() -> str:
+    """
+    Pick the fastest H.264 encoder that the configured ffmpeg can actually use:
+    h264_nvenc on NVIDIA machines, h264_vaapi when a VAAPI render node is present,
+    otherwise (or if the test encode fails) the libx264 software encoder.
+    """
+    candidates = []
+    if shutil.which("nvidia-smi"):
+        candidates.append("h264_nvenc")
+    if os.path.exists("/dev/dri/renderD128"):
+        candidates.append("h264_vaapi")
+
+    ffmpeg = get_setting("FFMPEG_BINARY")
+    for encoder in candidates:
+        if _ffmpeg_can_encode(ffmpeg, encoder):
+            return encoder
+    return "libx264"
+
+# Subtitle style rendered by libass: yellow Arial with a 1px black outline, bottom centered.
+# The canvas matches the image size, so sizes are in pixels as in the MoviePy path.
+ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+WrapStyle: 0
+PlayResX: {width}
+PlayResY: {height}
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,22,&H0000FFFF,&H0000FFFF,&H00000000,&H00000000,0,0,0,0,100,100,0,0,1,1,0,2,{margin},{margin},0,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+# One SRT cue: start and end timestamps followed by its text lines
+_SRT_CUE_PATTERN = re.compile(
+    r'(\d+):(\d+):(\d+),(\d+)\s*-->\s*(\d+):(\d+):(\d+),(\d+)[^\n]*\n(.*?)(?=\n[ \t]*\n|\Z)',
+    re.DOTALL
+)
+
+
+def _load_font(fontsize: int) -> ImageFont.ImageFont:
+    """Load Arial at the given size, falling back to Pillow's default font"""
+    try:
+        return ImageFont.truetype("arial.ttf", fontsize)
+    except OSError:
+        return ImageFont.load_default(fontsize)
+
+
+def _wrap_text(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.ImageFont, max_width: float) -> str:
+    """Greedy word wrap so every line fits within max_width pixels"""
+    lines, line = [], ""
+    for word in text.split():
+        candidate = f"{line} {word}".strip()
+        if line and draw.textlength(candidate, font=font) > max_width:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    if line:
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _audio_duration(path: str) -> float:
+    """Duration of an audio file in seconds, read from the WAV header when possible"""
+    try:
+        with wave.open(path, "rb") as wav:
+            return wav.getnframes() / wav.getframerate()
+    except (wave.Error, EOFError):
+        return ffmpeg_parse_infos(path)["duration"]
+
+
+def _read_srt(srt_file: str) -> List[tuple]:
+    """Parse an SRT file into (start, end, text) cues, with times in seconds"""
+    with open(srt_file, "r", encoding="utf-8") as f:
+        content = f.read()
+    cues = []
+    for match in _SRT_CUE_PATTERN.finditer(content):
+        h1, m1, s1, ms1, h2, m2, s2, ms2 = map(int, match.groups()[:8])
+        start = h1 * 3600 + m1 * 60 + s1 + ms1 / 1000
+        end = h2 * 3600 + m2 * 60 + s2 + ms2 / 1000
+        cues.append((start, end, match.group(9).strip()))
+    return cues
+
+
+def _ass_time(seconds: float) -> str:
+    """Format seconds as an ASS timestamp (H:MM:SS.cc)"""
+    hours, rest = divmod(round(seconds * 100), 360000)
+    minutes, rest = divmod(rest, 6000)
+    secs, centis = divmod(rest, 100)
+    return "%d:%02d:%02d.%02d" % (hours, minutes, secs, centis)
+
+
+def _render_text(
+    text: str,
+    fontsize: int,
+    color: str,
+    max_width: float,
+    stroke_color: Optional[str] = None,
+    stroke_width: int = 0
+) -> Image.Image:
+    """Render centered, word-wrapped text onto a transparent RGBA image with Pillow"""
+    font = _load_font(fontsize)
+    measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    wrapped = _wrap_text(measure, text, font, max_width)
+    left, top, right, bottom = measure.multiline_textbbox(
+        (0, 0), wrapped, font=font, align="center", stroke_width=stroke_width
+    )
+
+    size = (max(1, math.ceil(right - left)), max(1, math.ceil(bottom - top)))
+    image = Image.new("RGBA", size, (0, 0, 0, 0))
+    ImageDraw.Draw(image).multiline_text(
+        (-left, -top), wrapped, font=font, fill=color, align="center",
+        stroke_width=stroke_width, stroke_fill=stroke_color
+    )
+    return image
 
 
 class VideoCreator:
-    def __init__(self, output_folder: str, logger: Optional[Logger] = None, color: Optional[str] = "gray") -> None:
+    def __init__(
+        self,
+        output_folder: str,
+        logger: Optional[Logger] = None,
+        color: Optional[str] = "gray",
+        hw_encoder: str = "libx264",
+        threads: Optional[int] = None
+    ) -> None:
+        if hw_encoder not in VIDEO_ENCODERS:
+            raise ValueError(f"Unsupported encoder '{hw_encoder}'. Supported: {list(VIDEO_ENCODERS)}")
         self.output_folder = output_folder
         self.logger = logger
         self.color = color
+        self.hw_encoder = hw_encoder
+        # Encoder threads per video (None lets ffmpeg/MoviePy use every core)
+        self.threads = threads
 
     def _log(self, text: str, color: str = 'gray') -> None:
         use_color = color if color is not None else self.color
@@ -29,24 +208,145 @@ class VideoCreator:
             
     def _create_subtitles_clip(self, srt_file: str, video_size: tuple) -> SubtitlesClip:
         """Create a subtitles clip from SRT file with custom styling"""
-        def make_text(txt):
-            """Helper function to style each subtitle"""
-            return TextClip(
-                txt.upper(),  # Convert to uppercase
-                font='Arial',
+        @functools.lru_cache(maxsize=512)
+        def render_text(txt):
+            """Render each distinct subtitle line only once, with Pillow instead of ImageMagick"""
+            image = _render_text(
+                txt,
                 fontsize=22,
                 color='yellow',
+                max_width=video_size[0] * 0.9,  # 90% of video width
                 stroke_color='black',
-                stroke_width=0.5,
-                size=(video_size[0] * 0.9, None),  # 90% of video width
-                method='caption',
-                align='center'
+                stroke_width=1
             )
+            return ImageClip(np.array(image))  # Alpha channel becomes the clip mask
+
+        def make_text(txt):
+            """Helper function to style each subtitle"""
+            return render_text(txt.upper())  # Convert to uppercase
         
         # Parse SRT file and create subtitles clip
         subs = file_to_subtitles(srt_file)
         return SubtitlesClip(subs, make_text)
 
+    @staticmethod
+    def _escape_filter_value(value: str) -> str:
+        """Quote a path or value for use inside an ffmpeg filtergraph"""
+        value = value.replace("\\", "/").replace(":", "\\:")
+        return "'" + value.replace("'", "'\\''") + "'"
+
+    def _encoder_args(self, video_filters: List[str]) -> List[str]:
+        """ffmpeg video encoder arguments; encoder-specific filters are appended to video_filters"""
+        preset, params = VIDEO_ENCODERS[self.hw_encoder]
+        params = list(params)
+        if "-vf" in params:
+            index = params.index("-vf")
+            video_filters.append(params[index + 1])
+            del params[index:index + 2]
+
+        args = ["-c:v", self.hw_encoder, "-preset", preset, *params]
+        if self.hw_encoder == "libx264":
+            args += ["-pix_fmt", "yuv420p"]
+        return args
+
+    def _write_ass_subtitles(self, srt_file: str, ass_path: str, video_size: tuple) -> None:
+        """Convert an SRT file once into a styled ASS script for ffmpeg's libass filter"""
+        width, height = video_size
+        events = [
+            # Subtitles are shown in uppercase
+            f"Dialogue: 0,{_ass_time(start)},{_ass_time(end)},Default,,0,0,0,,"
+            + text.upper().replace("\n", "\\N")
+            for start, end, text in _read_srt(srt_file)
+        ]
+        with open(ass_path, "w", encoding="utf-8") as f:
+            # Lines wrap at 90% of the video width, like the MoviePy subtitles
+            f.write(ASS_HEADER.format(width=width, height=height, margin=round(width * 0.05)))
+            f.write("\n".join(events) + "\n")
+
+    def _create_video_ffmpeg(
+        self,
+        voice_path: str,
+        background_music_path: str,
+        picture_path: str,
+        background_volume: float,
+        srt_file: Optional[str],
+        text: Optional[str],
+        output_path: str
+    ) -> None:
+        """Render a still image + audio + subtitles video in a single ffmpeg pass"""
+        with Image.open(picture_path) as image:
+            video_size = image.size
+        duration = _audio_duration(voice_path)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Even dimensions are required by yuv420p
+            video_filters = ["scale=trunc(iw/2)*2:trunc(ih/2)*2"]
+
+            if text:
+                # Same wrapped Pillow overlay as the MoviePy path, burned into the image once
+                self._log("Creating text overlay...")
+                background_path = os.path.join(tmp_dir, "background.png")
+                Image.fromarray(self._burn_text(picture_path, text)).save(background_path)
+            else:
+                background_path = picture_path
+
+            if srt_file and os.path.exists(srt_file):
+                self._log("Adding subtitles...")
+                ass_path = os.path.join(tmp_dir, "subtitles.ass")
+                self._write_ass_subtitles(srt_file, ass_path, video_size)
+                video_filters.append(f"ass={self._escape_filter_value(ass_path)}")
+
+            encoder_args = self._encoder_args(video_filters)
+            filter_complex = (
+                f"[0:v]{','.join(video_filters)}[v];"
+                # Only the part of the song that is actually heard is decoded and scaled
+                f"[2:a]volume={background_volume},atrim=0:{duration},asetpts=PTS-STARTPTS[bg];"
+                f"[1:a][bg]amix=inputs=2:duration=first:normalize=0[a]"
+            )
+            command = [
+                get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error",
+                "-loop", "1", "-framerate", "12", "-i", background_path,
+                "-i", voice_path,
+                "-i", background_music_path,
+                "-filter_complex", filter_complex,
+                "-map", "[v]", "-map", "[a]",
+                *encoder_args,
+                *(["-threads", str(self.threads)] if self.threads else []),
+                "-c:a", "aac",
+                # The looped image never ends, so the length comes from the voice track
+                "-t", str(duration),
+                output_path
+            ]
+            self._log(f"Writing final video to {output_path}...")
+            subprocess.run(command, check=True)
+
+    def _prepare_background_music(
+        self,
+        background_music_path: str,
+        background_volume: float,
+        duration: float,
+        output_path: str
+    ) -> None:
+        """Trim and scale the background music with ffmpeg into a short WAV file"""
+        command = [
+            get_setting("FFMPEG_BINARY"), "-y", "-loglevel", "error",
+            "-t", str(duration), "-i", background_music_path,
+            "-af", f"volume={background_volume}",
+            output_path
+        ]
+        subprocess.run(command, check=True)
+
+    def _burn_text(self, picture_path: str, text: str) -> np.ndarray:
+        """Draw the text overlay onto a copy of the background image, once"""
+        with Image.open(picture_path) as source:
+            image = source.convert("RGB")
+        overlay = _render_text(text, fontsize=16, color="#e39b3f", max_width=image.width * 0.9)
+
+        # Centered at the bottom of the image
+        position = ((image.width - overlay.width) // 2, image.height - overlay.height)
+        image.paste(overlay, position, overlay)
+        return np.array(image)
+
     def create_video(
         self,
         voice_path: str,
@@ -55,60 +355,131 @@ class VideoCreator:
         background_volume: float = 0.3,
         srt_file: Optional[str] = None,
         text: Optional[str] = None,
-        output_path: Optional[str] = None
+        output_path: Optional[str] = None,
+        fast: bool = True
+    ) -> str:
+        """
+        Create a video from a still image, a voice track, background music and optional subtitles.
+        With fast=True the video is rendered directly by ffmpeg instead of frame by frame through MoviePy.
+        Returns the path of the written video.
+        """
+        if output_path is None:
+            voice_filename = os.path.splitext(os.path.basename(voice_path))[0]
+            output_path = os.path.join(self.output_folder, f"{voice_filename}.mp4")
+
+        if fast:
+            self._create_video_ffmpeg(
+                voice_path, background_music_path, picture_path,
+                background_volume, srt_file, text, output_path
+            )
+            self._log("Video creation completed!", color="green")
+            return output_path
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self._create_video_moviepy(
+                voice_path, background_music_path, picture_path,
+                background_volume, srt_file, text, output_path, tmp_dir
+            )
+        self._log("Video creation completed!", color="green")
+        return output_path
+
+    def create_videos_batch(
+        self,
+        jobs: List[Dict[str, Any]],
+        max_workers: Optional[int] = None,
+        threads_per_video: int = 2
+    ) -> List[str]:
+        """
+        Create several videos in parallel worker processes.
+        Each job is a dict of create_video keyword arguments; every render gets
+        threads_per_video encoder threads so the workers together fill the CPU.
+        Returns the output paths in job order.
+        """
+        if threads_per_video < 1:
+            raise ValueError(f"threads_per_video must be at least 1, got {threads_per_video}")
+        if not jobs:
+            return []
+        if max_workers is None:
+            max_workers = max(1, (os.cpu_count() or 2) // threads_per_video)
+        max_workers = min(max_workers, len(jobs))
+
+        worker = VideoCreator(
+            self.output_folder, self.logger, self.color, self.hw_encoder, threads=threads_per_video
+        )
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(worker.create_video, **job) for job in jobs]
+            # Collect in submission order so paths line up with the jobs
+            return [future.result() for future in futures]
+
+    def _create_video_moviepy(
+        self,
+        voice_path: str,
+        background_music_path: str,
+        picture_path: str,
+        background_volume: float,
+        srt_file: Optional[str],
+        text: Optional[str],
+        output_path: str,
+        tmp_dir: str
     ) -> None:
+        """Render the video frame by frame through MoviePy"""
+        # Known up front from the WAV header, so no clip has to be probed for it
+        duration = _audio_duration(voice_path)
+
         self._log("Loading voice audio...")
         voice_clip = AudioFileClip(voice_path)
-        duration = voice_clip.duration
-
-        self._log("Loading background music and adjusting volume...")
-        bg_music = AudioFileClip(background_music_path).volumex(background_volume).subclip(0, duration)
-
-        self._log("Loading background image...")
-        image_clip = ImageClip(picture_path).set_duration(duration).set_fps(24)
-
-        # Create base clips list
-        clips = [image_clip]
-
-        # Add optional text overlay (removed the text=False override)
-        if text:
-            self._log("Creating text overlay...")
-            text_clip = TextClip(
-                text,
-                fontsize=16,
-                color="#e39b3f",
-                font="Arial",
-                method='caption',
-                size=(int(image_clip.w * 0.9), None),
-                align='center'
-            ).set_position(("center", "bottom")).set_duration(duration)
-            clips.append(text_clip)
-
-        # Add subtitles if SRT file provided
-        if srt_file and os.path.exists(srt_file):
-            self._log("Adding subtitles...")
-            subs_clip = self._create_subtitles_clip(srt_file, (image_clip.w, image_clip.h))
-            subs_clip = subs_clip.set_position(('center', 'bottom')).set_duration(duration)
-            clips.append(subs_clip)
-
-        # Compose final video
-        final_video = CompositeVideoClip(clips)
-
-        self._log("Combining audio tracks...")
-        mixed_audio = CompositeAudioClip([bg_music, voice_clip.set_duration(duration)])
-        final_video = final_video.set_audio(mixed_audio)
 
-        if output_path is None:
-            voice_filename = os.path.splitext(os.path.basename(voice_path))[0]
-            video_filename = f"{voice_filename}.mp4"
-            output_path = os.path.join(self.output_folder, video_filename)
-        
-        self._log(f"Writing final video to {output_path}...")
-        final_video.write_videofile(
-            output_path,
-            fps=12,
-            codec='libx264',
-            audio_codec='aac',
-            logger=None
-        )
-        self._log("Video creation completed!", color="green")
\ No newline at end of file
+        bg_music = None
+        try:
+            self._log("Loading background music and adjusting volume...")
+            # ffmpeg decodes only the needed part of the song and applies the volume,
+            # so MoviePy never holds (or rescales) the whole track in memory
+            bg_music_path = os.path.join(tmp_dir, "background_music.wav")
+            self._prepare_background_music(background_music_path, background_volume, duration, bg_music_path)
+            bg_music = AudioFileClip(bg_music_path)
+
+            self._log("Loading background image...")
+            # The text overlay is static, so it is burned into the background once
+            # instead of being alpha-blended on every frame
+            if text:
+                self._log("Creating text overlay...")
+                background = self._burn_text(picture_path, text)
+            else:
+                background = picture_path
+            # The image never changes, so it does not need to be regenerated at the video fps
+            image_clip = ImageClip(background).set_duration(duration).set_fps(1)
+
+            # Create base clips list
+            clips = [image_clip]
+
+            # Add subtitles if SRT file provided
+            if srt_file and os.path.exists(srt_file):
+                self._log("Adding subtitles...")
+                subs_clip = self._create_subtitles_clip(srt_file, (image_clip.w, image_clip.h))
+                subs_clip = subs_clip.set_position(('center', 'bottom')).set_duration(duration)
+                clips.append(subs_clip)
+
+            # Compose final video
+            final_video = CompositeVideoClip(clips)
+
+            self._log("Combining audio tracks...")
+            mixed_audio = CompositeAudioClip([bg_music, voice_clip.set_duration(duration)])
+            final_video = final_video.set_audio(mixed_audio)
+
+            self._log(f"Writing final video to {output_path}...")
+            preset, ffmpeg_params = VIDEO_ENCODERS[self.hw_encoder]
+            final_video.write_videofile(
+                output_path,
+                fps=12,
+                codec=self.hw_encoder,
+                audio_codec='aac',
+                preset=preset,
+                ffmpeg_params=ffmpeg_params,
+                threads=self.threads or os.cpu_count(),
+                logger=None
+            )
+        finally:
+            # Release the readers (also on failure) before the temporary music file is removed
+            if bg_music is not None:
+                bg_music.close()
+            voice_clip.close()
\ No newline at end of file
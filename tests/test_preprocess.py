@@ -53,5 +53,42 @@ def test_save_transcript(temp_html_file):
         'This is a paragraph.\n'
         'Some quote here.'
     )
+
+
+def test_clean_text_collapses_whitespace_and_non_printable():
+    processor = DocumentProcessor()
+    assert processor._clean_text('  Hola\t\n mundo \x01 \U0001F600 ñandú  ') == 'Hola mundo ñandú'
+
+def test_process_txt_splits_paragraphs_on_blank_lines():
+    with NamedTemporaryFile('w', suffix=".txt", encoding='utf-8', delete=False) as f:
+        f.write("First line\nsame paragraph\n  \n\nSecond paragraph\n\n!!\n\nThird paragraph")
+        path = f.name
+    try:
+        result = DocumentProcessor().process_file(path)
+    finally:
+        os.unlink(path)
+
+    assert result == [
+        ('p', 'First line same paragraph'),
+        ('p', 'Second paragraph'),
+        ('p', 'Third paragraph')
+    ]
+
 if __name__ == "__main__":
-    pytest.main()
\ No newline at end of file
+    pytest.main()
+
+
+def test_process_html_keeps_words_split_by_inline_tags(tmp_path):
+    html_path = tmp_path / "inline.html"
+    html_path.write_text(
+        "<html><body><p>Una pala<em>bra</em> con <strong>formato</strong>.</p></body></html>",
+        encoding='utf-8'
+    )
+
+    result = DocumentProcessor().process_file(str(html_path))
+
+    assert result == [
+        ('p', 'Una palabra con formato.'),
+        ('em', 'bra'),
+        ('strong', 'formato'),
+    ]
@@ -1,8 +1,18 @@
-from icecream import ic
 import pytest
 import os
+import json
+import wave
+import random
+import asyncio
 from src.preprocess import DocumentProcessor
-from src.tts import TTSEngine  # Ajusta según tu estructura real
+from src.tts import TTSEngine, format_srt_time, find_wav_data, MAX_CONCURRENT_REQUESTS, MIN_PARTS_FOR_CONCURRENCY  # Ajusta según tu estructura real
+
+# icecream is only imported when debugging output is requested (DEBUG_IC=1)
+if os.environ.get("DEBUG_IC"):
+    from icecream import ic
+else:
+    def ic(*args, **kwargs):
+        pass
 
 HTML_CONTENT = """
 <html><body>
@@ -15,7 +25,7 @@ HTML_CONTENT = """
 </body></html>
 """
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def temp_html_file():
     from tempfile import NamedTemporaryFile
     with NamedTemporaryFile('w', suffix=".html", encoding='utf-8', delete=False) as f:
@@ -53,9 +63,9 @@ def test_create_srt(temp_html_file):
     os.remove(srt_output)
     
 # Check language
-@pytest.fixture
+@pytest.fixture(scope="session")
 def tts_engine():
-    """Fixture to provide a TTSEngine instance for tests."""
+    """Fixture to provide a TTSEngine instance shared by all tests (the engine holds no per-test state)."""
     return TTSEngine()
 
 def test_spanish_html_detection(tts_engine):
@@ -69,7 +79,7 @@ def test_spanish_html_detection(tts_engine):
         ("p", "Finalmente, concluimos este artículo con algunas reflexiones finales sobre el tema.")
     ]
     
-    detected_language = tts_engine.text_to_audio(spanish_html_tuples, "test_spanish.wav", language=None)
+    detected_language = tts_engine.detect_language(spanish_html_tuples, language=None)
     assert detected_language == "es"
 
 def test_english_html_detection(tts_engine):
@@ -83,7 +93,7 @@ def test_english_html_detection(tts_engine):
         ("p", "Finally, we conclude this article with some final thoughts on the topic.")
     ]
     
-    detected_language = tts_engine.text_to_audio(english_html_tuples, "test_english.wav", language=None)
+    detected_language = tts_engine.detect_language(english_html_tuples, language=None)
     assert detected_language == "en"
 
 def test_spanish_with_accents(tts_engine):
@@ -94,7 +104,7 @@ def test_spanish_with_accents(tts_engine):
         ("p", "Esto es fácil de entender para cualquiera que hable español.")
     ]
     
-    detected_language = tts_engine.text_to_audio(spanish_with_accents, "test_accents.wav", language=None)
+    detected_language = tts_engine.detect_language(spanish_with_accents, language=None)
     assert detected_language == "es"
 
 def test_english_technical_content(tts_engine):
@@ -105,7 +115,7 @@ def test_english_technical_content(tts_engine):
         ("p", "Development and testing are essential components of the software engineering process.")
     ]
     
-    detected_language = tts_engine.text_to_audio(english_technical, "test_technical.wav", language=None)
+    detected_language = tts_engine.detect_language(english_technical, language=None)
     assert detected_language == "en"
 
 def test_manual_spanish_override(tts_engine):
@@ -115,7 +125,7 @@ def test_manual_spanish_override(tts_engine):
         ("p", "But we want to force Spanish voice")
     ]
     
-    detected_language = tts_engine.text_to_audio(english_content, "test_override_es.wav", language="es")
+    detected_language = tts_engine.detect_language(english_content, language="es")
     assert detected_language == "es"
 
 def test_manual_english_override(tts_engine):
@@ -125,7 +135,7 @@ def test_manual_english_override(tts_engine):
         ("p", "Pero queremos forzar voz en inglés")
     ]
     
-    detected_language = tts_engine.text_to_audio(spanish_content, "test_override_en.wav", language="en")
+    detected_language = tts_engine.detect_language(spanish_content, language="en")
     assert detected_language == "en"
 
 def test_short_spanish_text(tts_engine):
@@ -135,7 +145,7 @@ def test_short_spanish_text(tts_engine):
         ("p", "Buenos días, ¿cómo estás?")
     ]
     
-    detected_language = tts_engine.text_to_audio(short_spanish, "test_short_es.wav", language=None)
+    detected_language = tts_engine.detect_language(short_spanish, language=None)
     assert detected_language == "es"
 
 def test_short_english_text(tts_engine):
@@ -145,7 +155,7 @@ def test_short_english_text(tts_engine):
         ("p", "Good morning, how are you?")
     ]
     
-    detected_language = tts_engine.text_to_audio(short_english, "test_short_en.wav", language=None)
+    detected_language = tts_engine.detect_language(short_english, language=None)
     assert detected_language == "en"
 
 def test_mixed_content_defaults_to_english(tts_engine):
@@ -156,7 +166,7 @@ def test_mixed_content_defaults_to_english(tts_engine):
         ("p", "This is a mixed paragraph with some Spanish and English words.")
     ]
     
-    detected_language = tts_engine.text_to_audio(mixed_content, "test_mixed.wav", language=None)
+    detected_language = tts_engine.detect_language(mixed_content, language=None)
     assert detected_language == "en"
 
 def test_empty_content_raises_error(tts_engine):
@@ -228,4 +238,230 @@ def test_detect_language_from_text_short_english(tts_engine):
 def test_edge_cases_language_detection(tts_engine, text, expected_lang):
     """Test various edge cases for language detection."""
     detected = tts_engine._detect_language_from_text(text)
-    assert detected == expected_lang
\ No newline at end of file
+    assert detected == expected_lang
+
+def test_text_to_audio_reuses_cached_audio(tmp_path, monkeypatch):
+    """Test that identical requests are served from the audio cache."""
+    calls = []
+
+    async def fake_generate_wav(text, output_path, voice):
+        calls.append(text)
+        with open(output_path, "wb") as f:
+            f.write(b"RIFF fake audio")
+
+    tts = TTSEngine(cache_dir=str(tmp_path / "cache"))
+    monkeypatch.setattr(tts, "_generate_wav", fake_generate_wav)
+    content = [("h1", "Hello world"), ("p", "Good morning, how are you?")]
+
+    first = tmp_path / "first.wav"
+    second = tmp_path / "second.wav"
+    tts.text_to_audio(content, str(first), language="en")
+    tts.text_to_audio(content, str(second), language="en")
+
+    assert len(calls) == 1
+    assert second.read_bytes() == first.read_bytes()
+
+
+
+class FakeRecognizer:
+    """Stand-in for vosk.KaldiRecognizer: one word spanning all the audio it was fed."""
+    fail = False
+
+    def __init__(self, model, framerate):
+        self.framerate = framerate
+        self.received = 0
+
+    def SetWords(self, enabled):
+        pass
+
+    def AcceptWaveform(self, data):
+        if self.fail:
+            raise RuntimeError("recognizer failed")
+        self.received += len(data)
+        return False
+
+    def FinalResult(self):
+        end = self.received / (2 * self.framerate)
+        return json.dumps({"result": [{"word": "hola", "start": 0.0, "end": end}]})
+
+
+@pytest.fixture
+def streaming_tts(tmp_path, monkeypatch):
+    """TTSEngine whose synthesis writes 2s of silence and whose Vosk model is stubbed."""
+    pcm = b"\x00\x00" * 16000 * 2
+    calls = []
+
+    async def fake_generate_wav(parts, output_path, voice, pcm_fd=None):
+        calls.append(output_path)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with wave.open(output_path, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(16000)
+            wf.writeframes(pcm)
+        if pcm_fd is not None:
+            os.write(pcm_fd, pcm)  # Fits in the pipe buffer, so it never blocks
+
+    tts = TTSEngine(cache_dir=str(tmp_path / "cache"))
+    monkeypatch.setattr(tts, "_generate_wav", fake_generate_wav)
+    monkeypatch.setattr(tts, "_load_vosk_model", lambda language: object())
+    monkeypatch.setattr("src.tts.KaldiRecognizer", FakeRecognizer)
+    monkeypatch.setattr(FakeRecognizer, "fail", False)
+    return tts, calls
+
+
+def test_text_to_audio_with_srt_transcribes_while_synthesizing(tmp_path, streaming_tts):
+    """Test that the PCM piped during synthesis is transcribed into the SRT file."""
+    tts, calls = streaming_tts
+    content = [("h1", "Hola mundo"), ("p", "Buenos días, ¿cómo estás?")]
+    audio = tmp_path / "out" / "audio.wav"
+    srt = tmp_path / "out" / "audio.srt"
+
+    language = tts.text_to_audio_with_srt(content, str(audio), str(srt))
+
+    assert language == "es"
+    assert calls == [str(audio)]
+    assert srt.read_text(encoding="utf-8") == "1\n00:00:00,000 --> 00:00:02,000\nhola\n\n"
+
+
+def test_text_to_audio_with_srt_cache_hit_skips_synthesis(tmp_path, streaming_tts):
+    """Test that cached audio is transcribed from the WAV file without synthesizing again."""
+    tts, calls = streaming_tts
+    content = [("h1", "Hola mundo"), ("p", "Buenos días, ¿cómo estás?")]
+    tts.text_to_audio_with_srt(content, str(tmp_path / "first.wav"))
+
+    srt = tmp_path / "second.srt"
+    tts.text_to_audio_with_srt(content, str(tmp_path / "second.wav"), str(srt))
+
+    assert calls == [str(tmp_path / "first.wav")]
+    assert srt.read_text(encoding="utf-8") == (tmp_path / "first.srt").read_text(encoding="utf-8")
+
+
+def test_text_to_audio_with_srt_propagates_recognizer_errors(tmp_path, streaming_tts, monkeypatch):
+    """Test that a transcription failure is raised instead of hanging or writing an SRT."""
+    tts, _ = streaming_tts
+    monkeypatch.setattr(FakeRecognizer, "fail", True)
+    srt = tmp_path / "audio.srt"
+
+    with pytest.raises(RuntimeError, match="recognizer failed"):
+        tts.text_to_audio_with_srt([("p", "Hola mundo")], str(tmp_path / "audio.wav"), str(srt))
+    assert not srt.exists()
+
+
+
+def test_text_to_audio_with_srt_reports_recognizer_error_over_broken_pipe(tmp_path, streaming_tts, monkeypatch):
+    """Test that the recognizer's error is raised when it breaks the pipe ffmpeg is still writing to."""
+    tts, _ = streaming_tts
+    monkeypatch.setattr(FakeRecognizer, "fail", True)
+
+    async def fake_generate_wav(parts, output_path, voice, pcm_fd=None):
+        # Like ffmpeg: keeps writing well past the pipe buffer and fails on EPIPE
+        try:
+            for _ in range(64):
+                os.write(pcm_fd, b"\x00" * 16384)
+        except BrokenPipeError:
+            raise RuntimeError("ffmpeg failed to write the audio")
+
+    monkeypatch.setattr(tts, "_generate_wav", fake_generate_wav)
+
+    with pytest.raises(RuntimeError, match="recognizer failed") as excinfo:
+        tts.text_to_audio_with_srt([("p", "Hola mundo")], str(tmp_path / "audio.wav"))
+    assert "ffmpeg failed" in str(excinfo.value.__cause__)
+
+class FakeCommunicator:
+    """Stand-in for edge_tts.Communicate that answers after a random delay."""
+    active = 0
+    peak = 0
+    created = []
+
+    def __init__(self, text):
+        self.text = text
+        FakeCommunicator.created.append(text)
+
+    async def stream(self):
+        FakeCommunicator.active += 1
+        FakeCommunicator.peak = max(FakeCommunicator.peak, FakeCommunicator.active)
+        try:
+            await asyncio.sleep(random.uniform(0, 0.01))
+            if self.text.startswith(("fail", "slow")):
+                await asyncio.sleep(float(self.text.split()[1]))
+            if self.text.startswith("fail"):
+                raise ConnectionError(self.text)
+            yield {"type": "WordBoundary"}
+            yield {"type": "audio", "data": self.text.encode()}
+        finally:
+            FakeCommunicator.active -= 1
+
+
+@pytest.fixture
+def fake_communicator(tts_engine, monkeypatch):
+    """Route Edge TTS requests of the shared engine to FakeCommunicator."""
+    monkeypatch.setattr(FakeCommunicator, "active", 0)
+    monkeypatch.setattr(FakeCommunicator, "peak", 0)
+    monkeypatch.setattr(FakeCommunicator, "created", [])
+    monkeypatch.setattr(tts_engine, "_create_communicator", lambda text, voice: FakeCommunicator(text))
+    return FakeCommunicator
+
+
+def _collect_audio(tts, parts):
+    async def collect():
+        return [data async for data in tts._synthesize(parts, "voice")]
+    return asyncio.run(collect())
+
+
+def test_synthesize_keeps_order_and_caps_concurrency(tts_engine, fake_communicator):
+    """Test that concurrent requests finishing out of order are yielded in paragraph order."""
+    parts = [f"part {i}" for i in range(30)]
+
+    audio = _collect_audio(tts_engine, parts)
+
+    assert audio == [part.encode() for part in parts]
+    assert fake_communicator.peak == MAX_CONCURRENT_REQUESTS
+
+
+def test_synthesize_short_input_uses_single_request(tts_engine, fake_communicator):
+    """Test that inputs below MIN_PARTS_FOR_CONCURRENCY are sent as one request."""
+    parts = [f"part {i}" for i in range(MIN_PARTS_FOR_CONCURRENCY - 1)]
+
+    audio = _collect_audio(tts_engine, parts)
+
+    assert fake_communicator.created == [" ".join(parts)]
+    assert audio == [" ".join(parts).encode()]
+
+
+def test_synthesize_failure_stops_pending_requests(tts_engine, fake_communicator):
+    """Test that a failed request is raised only after the other requests have been cancelled."""
+    parts = ["fail 0.02", "fail 0", "slow 5", "slow 5"]
+
+    async def collect():
+        with pytest.raises(ConnectionError, match="fail 0.02"):
+            async for _ in tts_engine._synthesize(parts, "voice"):
+                pass
+        return fake_communicator.active
+
+    assert asyncio.run(collect()) == 0
+
+@pytest.mark.parametrize("seconds,expected", [
+    (0, "00:00:00,000"),
+    (65.25, "00:01:05,250"),
+    (3725.5, "01:02:05,500"),
+])
+def test_format_srt_time(seconds, expected):
+    """Test SRT timestamp formatting."""
+    assert format_srt_time(seconds) == expected
+
+
+def test_find_wav_data_locates_pcm_samples(tmp_path):
+    """Test that the PCM data chunk is located in a WAV written by the wave module."""
+    import wave
+    path = tmp_path / "sample.wav"
+    pcm = bytes(range(256)) * 10
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(pcm)
+
+    data = path.read_bytes()
+    start, end = find_wav_data(data)
+    assert data[start:end] == pcm
@@ -0,0 +1,95 @@
+import time
+import random
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from src.tts import TTSEngine
+from src.videocreator import VideoCreator, _read_srt, _ass_time
+
+
+@pytest.fixture
+def srt_file(tmp_path):
+    """SRT file written by the TTS engine from a fake Vosk transcription."""
+    transcription = [{"result": [
+        {"word": "hola", "start": 0.5, "end": 1.0},
+        {"word": "mundo", "start": 1.2, "end": 1.8},
+        {"word": "adiós", "start": 4.5, "end": 5.25},
+    ]}]
+    path = tmp_path / "subtitles.srt"
+    TTSEngine()._write_srt(transcription, str(path), segment_duration=4.0)
+    return path
+
+
+def test_read_srt_parses_cues_written_by_tts(srt_file):
+    """Test that cues written by TTSEngine are read back with their times and text."""
+    cues = _read_srt(str(srt_file))
+
+    assert [text for _, _, text in cues] == ["hola mundo", "adiós"]
+    assert [(start, end) for start, end, _ in cues] == [
+        (pytest.approx(0.0), pytest.approx(1.8)),
+        (pytest.approx(4.0), pytest.approx(5.25)),
+    ]
+
+
+@pytest.mark.parametrize("seconds,expected", [
+    (0, "0:00:00.00"),
+    (59.994, "0:00:59.99"),
+    (59.999, "0:01:00.00"),
+    (3599.996, "1:00:00.00"),
+    (3725.5, "1:02:05.50"),
+])
+def test_ass_time(seconds, expected):
+    """Test ASS timestamp rounding, including minute and hour boundaries."""
+    assert _ass_time(seconds) == expected
+
+
+def test_write_ass_subtitles_styles_and_uppercases(srt_file, tmp_path):
+    """Test the generated ASS script: style block, canvas size and dialogue lines."""
+    ass_path = tmp_path / "subtitles.ass"
+    VideoCreator(str(tmp_path))._write_ass_subtitles(str(srt_file), str(ass_path), (500, 300))
+    lines = ass_path.read_text(encoding="utf-8").splitlines()
+
+    style_format = next(line for line in lines if line.startswith("Format: Name,"))
+    style = next(line for line in lines if line.startswith("Style:"))
+    fields = style[len("Style:"):].strip().split(",")
+    assert len(fields) == 23 == len(style_format.split(","))
+    assert fields[1:4] == ["Arial", "22", "&H0000FFFF"]  # Yellow Arial 22
+    assert fields[19:21] == ["25", "25"]  # Wraps at 90% of the width
+    assert "PlayResX: 500" in lines and "PlayResY: 300" in lines
+
+    dialogues = [line for line in lines if line.startswith("Dialogue:")]
+    assert dialogues == [
+        "Dialogue: 0,0:00:00.00,0:00:01.80,Default,,0,0,0,,HOLA MUNDO",
+        "Dialogue: 0,0:00:04.00,0:00:05.25,Default,,0,0,0,,ADIÓS",
+    ]
+
+
+def test_escape_filter_value_windows_path():
+    """Test that Windows paths are quoted for ffmpeg filtergraphs."""
+    assert VideoCreator._escape_filter_value("C:\\x\\y.ass") == "'C\\:/x/y.ass'"
+
+
+def test_create_videos_batch_returns_paths_in_job_order(tmp_path, monkeypatch):
+    """Test that batch results follow the job order even when renders finish out of order."""
+    rendered = []
+
+    def fake_create_video(self, voice_path, **kwargs):
+        time.sleep(random.uniform(0, 0.02))
+        rendered.append(self.threads)
+        return voice_path.replace(".wav", ".mp4")
+
+    # Threads stand in for worker processes so the stub does not have to be importable
+    monkeypatch.setattr("src.videocreator.ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(VideoCreator, "create_video", fake_create_video)
+    jobs = [{"voice_path": f"voice_{i}.wav", "picture_path": "image.jpg"} for i in range(8)]
+
+    paths = VideoCreator(str(tmp_path)).create_videos_batch(jobs, max_workers=4, threads_per_video=3)
+
+    assert paths == [f"voice_{i}.mp4" for i in range(8)]
+    assert rendered == [3] * 8
+
+
+@pytest.mark.parametrize("threads_per_video", [0, -2])
+def test_create_videos_batch_rejects_invalid_thread_count(tmp_path, threads_per_video):
+    """Test that a non-positive threads_per_video is rejected."""
+    with pytest.raises(ValueError, match="threads_per_video"):
+        VideoCreator(str(tmp_path)).create_videos_batch([{"voice_path": "v.wav"}], threads_per_video=threads_per_video)